@@ -0,0 +1,348 @@
+import time
+
+import numpy as np
+from scipy.stats import t, ttest_ind
+
+from routing_policies import RoutingPolicy
+from charging_station import Charging_Station, FAST_CHARGER_CURVE, SLOW_CHARGER_CURVE
+from road_network import Road_Network
+from system import EV_Charging_System
+from constants import (
+    MAX_QUEUE_LENGTH, TIME_FACTOR, BALK_BATTERY_LEVEL, MIN_BATTERY_THRESHOLD,
+    RENEGE_QUEUE_POSITION, RENEGE_WAIT_TIME, MEAN_INTERARRIVAL_TIME, STATION_POSITIONS,
+    BATTERY_MIN, BATTERY_MAX, MIN_CHARGE_AMOUNT, TARGET_MAX_FINAL_BATTERY,
+    ENERGY_CONSUMPTION_RATE, BATTERY_CAPACITY, X_MIN, X_MAX, Y_MIN, Y_MAX, SPEED_KM
+)
+
+# charger index in the last axis of the charger arrays
+FAST = 0
+SLOW = 1
+
+# fields of a car record, cars are stored as rows of floats so they can be moved between arrays in one assignment
+SYSTEM_ARRIVAL_TIME = 0 # time car was spawned in the system
+ROUTED_ARRIVAL_TIME = 1 # arrival time at the routed station
+DRIVE_TIME = 2          # drive time to the routed station (minutes)
+SOC_AFTER_DRIVE = 3     # SoC (%) on arrival at the station
+TARGET_CHARGE_LEVEL = 4 # target charge level (%)
+TIME_IN_QUEUE = 5       # time spent in queue (minutes)
+NUM_CAR_FIELDS = 6
+
+INITIAL_TRANSIT_SLOTS = 16 # starting capacity for cars driving to a station, per replication
+INITIAL_QUEUE_SLOTS = 16   # starting queue capacity, per station and replication
+
+# Runs many independent replications of EV_Charging_System at once.
+# Every replication keeps its own clock and state in NumPy arrays with the replication as the first axis.
+# Each step advances every unfinished replication by exactly one event (its own next event), and all
+# replications that share an event type are handled together with vectorized operations.
+# The random streams differ from the scalar engine, so results agree statistically, not seed for seed.
+class Batch_EV_Charging_System:
+    def __init__(self, routing_policy, num_delays_required, num_replications, seed, road_graph_file=None):
+        if routing_policy not in (RoutingPolicy.CLOSEST_STATION_FIRST, RoutingPolicy.SHORTEST_ESTIMATED_WAIT):
+            raise ValueError(f"Unknown routing policy: {routing_policy}")
+
+        self.routing_policy = routing_policy
+        self.num_delays_required = num_delays_required
+        self.num_replications = num_replications
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
+        num_stations = len(STATION_POSITIONS)
+        self.station_xy = np.array(STATION_POSITIONS, dtype=float)
+        self.charge_curves = [FAST_CHARGER_CURVE, SLOW_CHARGER_CURVE] # indexed by FAST / SLOW
+
+        # Road network travel times, the stations are only needed to build the matrices
+        stations = [Charging_Station(i + 1, position, lambda: 0.0) for i, position in enumerate(STATION_POSITIONS)]
+        self.road_network = Road_Network(road_graph_file, stations) if road_graph_file else None
+
+        # statistics, one entry per replication
+        self.num_cars_processed = np.zeros(num_replications, dtype=int)
+        self.total_time_in_system = np.zeros(num_replications)
+        self.total_wait_time = np.zeros(num_replications)
+        self.total_wait_time_queue = np.zeros(num_replications)
+        self.total_balking = np.zeros(num_replications, dtype=int)
+        self.total_reneging = np.zeros(num_replications, dtype=int)
+
+        self.sim_time = np.zeros(num_replications)
+        self.void_counter = np.zeros((num_replications, num_stations), dtype=int) # cars on the way to each station
+        self.next_arrival = self.rng.exponential(MEAN_INTERARRIVAL_TIME, num_replications)
+
+        # cars driving to a station, an empty slot has an infinite arrival time
+        self.transit_arrival = np.full((num_replications, INITIAL_TRANSIT_SLOTS), np.inf)
+        self.transit_station = np.zeros((num_replications, INITIAL_TRANSIT_SLOTS), dtype=int)
+        self.transit_car = np.zeros((num_replications, INITIAL_TRANSIT_SLOTS, NUM_CAR_FIELDS))
+
+        # chargers, an idle charger has an infinite departure time
+        self.charger_departure = np.full((num_replications, num_stations, 2), np.inf)
+        self.charger_car = np.zeros((num_replications, num_stations, 2, NUM_CAR_FIELDS))
+
+        # station queues, the first queue_length entries are the waiting cars in order
+        self.queue_car = np.zeros((num_replications, num_stations, INITIAL_QUEUE_SLOTS, NUM_CAR_FIELDS))
+        self.queue_length = np.zeros((num_replications, num_stations), dtype=int)
+
+    def step(self, reps: np.ndarray):
+        """
+        Advances each of the given replications by its next event.
+        """
+        rows = np.arange(len(reps))
+
+        transit_slot = self.transit_arrival[reps].argmin(axis=1)
+        transit_time = self.transit_arrival[reps, transit_slot]
+
+        departures = self.charger_departure[reps].reshape(len(reps), -1) # (station, charger) flattened
+        departure_idx = departures.argmin(axis=1)
+        departure_time = departures[rows, departure_idx]
+
+        event_times = np.column_stack((self.next_arrival[reps], transit_time, departure_time))
+        event = event_times.argmin(axis=1) # 0 system arrival, 1 station arrival, 2 departure
+        self.sim_time[reps] = event_times[rows, event]
+
+        self.arrival_system(reps[event == 0])
+
+        is_arrival = event == 1
+        self.arrival_station(reps[is_arrival], transit_slot[is_arrival])
+
+        is_departure = event == 2
+        station, charger = np.divmod(departure_idx[is_departure], 2)
+        self.departure(reps[is_departure], station, charger)
+
+    def arrival_system(self, reps: np.ndarray):
+        """
+        Spawns a car in each of the given replications, then handles reneging and routes the cars.
+        """
+        n = len(reps)
+        if n == 0:
+            return
+        now = self.sim_time[reps]
+
+        # Schedule next system arrival
+        self.next_arrival[reps] = now + self.rng.exponential(MEAN_INTERARRIVAL_TIME, n)
+
+        # Create the cars, see Car for the meaning of each draw
+        xs = self.rng.uniform(X_MIN, X_MAX, n)
+        ys = self.rng.uniform(Y_MIN, Y_MAX, n)
+        battery_level_initial = self.rng.uniform(BATTERY_MIN, BATTERY_MAX, n)
+        target_charge_level = self.rng.uniform(battery_level_initial + MIN_CHARGE_AMOUNT, TARGET_MAX_FINAL_BATTERY)
+
+        distance_km, drive_time = self._get_distances_and_drive_times(xs, ys) # (car, station)
+        soc_after_drive = battery_level_initial[:, None] - (distance_km * ENERGY_CONSUMPTION_RATE / BATTERY_CAPACITY) * 100
+        reachable = soc_after_drive >= MIN_BATTERY_THRESHOLD
+
+        self.reneging(reps)
+        chosen, routed = self.route(reps, drive_time, soc_after_drive, reachable)
+        self.total_balking[reps[~routed]] += 1
+
+        cars = np.flatnonzero(routed)
+        reps, chosen = reps[routed], chosen[routed]
+        routed_drive_time = drive_time[cars, chosen]
+
+        self.void_counter[reps, chosen] += 1
+        slot = self._free_transit_slots(reps)
+        self.transit_arrival[reps, slot] = now[cars] + routed_drive_time
+        self.transit_station[reps, slot] = chosen
+        self.transit_car[reps, slot] = np.column_stack((
+            now[cars],
+            now[cars] + routed_drive_time,
+            routed_drive_time,
+            soc_after_drive[cars, chosen],
+            target_charge_level[cars],
+            np.zeros(len(cars)),
+        ))
+
+    def _get_distances_and_drive_times(self, xs: np.ndarray, ys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (distance in km, drive time in minutes) from each spawn point to each station.
+        """
+        if self.road_network is not None:
+            return self.road_network.get_distances_and_drive_times(xs, ys)
+
+        distance_km = np.hypot(xs[:, None] - self.station_xy[:, 0], ys[:, None] - self.station_xy[:, 1])
+        return distance_km, distance_km / (SPEED_KM / 60)
+
+    def route(self, reps: np.ndarray, drive_time: np.ndarray, soc_after_drive: np.ndarray, reachable: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized Routing for one new car per replication.
+        A station is considered when the car can reach it and its effective queue is acceptable
+        (or the car is too low on battery to look elsewhere), as in Routing._verify_station_.
+
+        Returns (chosen station index per car, whether the car was routed at all).
+        """
+        q_len = self.queue_length[reps] + self.void_counter[reps]
+        valid = reachable & ~((q_len > MAX_QUEUE_LENGTH) & (soc_after_drive > BALK_BATTERY_LEVEL))
+
+        if self.routing_policy == RoutingPolicy.CLOSEST_STATION_FIRST:
+            score = drive_time
+        else: # SHORTEST_ESTIMATED_WAIT
+            score = q_len * TIME_FACTOR + drive_time
+
+        score = np.where(valid, score, np.inf)
+        return score.argmin(axis=1), valid.any(axis=1)
+
+    def reneging(self, reps: np.ndarray):
+        """
+        Removes the car at RENEGE_QUEUE_POSITION from every queue where it has waited too long.
+        """
+        if self.queue_car.shape[2] <= RENEGE_QUEUE_POSITION:
+            return
+
+        waited = self.sim_time[reps][:, None] - self.queue_car[reps, :, RENEGE_QUEUE_POSITION, ROUTED_ARRIVAL_TIME]
+        renege = (self.queue_length[reps] > RENEGE_QUEUE_POSITION) & (waited > RENEGE_WAIT_TIME)
+        rows, station = np.nonzero(renege)
+
+        self._remove_from_queue(reps[rows], station, RENEGE_QUEUE_POSITION)
+        np.add.at(self.total_reneging, reps[rows], 1) # a replication can renege at several stations
+
+    def arrival_station(self, reps: np.ndarray, slot: np.ndarray):
+        """
+        Moves the arriving car onto a free charger (fast first) or, if both are busy, into the queue.
+        """
+        station = self.transit_station[reps, slot]
+        car = self.transit_car[reps, slot]
+        self.transit_arrival[reps, slot] = np.inf
+        self.void_counter[reps, station] -= self.void_counter[reps, station] > 0
+
+        busy = np.isfinite(self.charger_departure[reps, station]) # (car, charger)
+        join_queue = busy.all(axis=1)
+        charger = np.where(busy[:, FAST], SLOW, FAST)
+
+        start = ~join_queue
+        self._start_service(reps[start], station[start], charger[start], car[start])
+        self._append_to_queue(reps[join_queue], station[join_queue], car[join_queue])
+
+    def departure(self, reps: np.ndarray, station: np.ndarray, charger: np.ndarray):
+        """
+        Records the departing car and starts serving the next queued car on the freed charger.
+        """
+        self.record_departure(reps, self.charger_car[reps, station, charger])
+
+        has_next = self.queue_length[reps, station] > 0
+        idle = ~has_next
+        self.charger_departure[reps[idle], station[idle], charger[idle]] = np.inf
+
+        reps, station, charger = reps[has_next], station[has_next], charger[has_next]
+        next_car = self.queue_car[reps, station, 0]
+        self._remove_from_queue(reps, station, 0)
+        next_car[:, TIME_IN_QUEUE] = self.sim_time[reps] - next_car[:, ROUTED_ARRIVAL_TIME]
+        self._start_service(reps, station, charger, next_car)
+
+    def record_departure(self, reps: np.ndarray, car: np.ndarray):
+        """
+        Updates the statistics of each replication with its departing car.
+        """
+        self.total_time_in_system[reps] += self.sim_time[reps] - car[:, SYSTEM_ARRIVAL_TIME]
+        self.total_wait_time_queue[reps] += car[:, TIME_IN_QUEUE]
+        self.total_wait_time[reps] += car[:, TIME_IN_QUEUE] + car[:, DRIVE_TIME] # total wait time includes drive time
+        self.num_cars_processed[reps] += 1
+
+    def _start_service(self, reps: np.ndarray, station: np.ndarray, charger: np.ndarray, car: np.ndarray):
+        service_time = np.empty(len(reps))
+        for charger_type, charge_curve in enumerate(self.charge_curves):
+            on_charger = charger == charger_type
+            service_time[on_charger] = charge_curve.charge_times(car[on_charger, SOC_AFTER_DRIVE], car[on_charger, TARGET_CHARGE_LEVEL])
+
+        self.charger_departure[reps, station, charger] = self.sim_time[reps] + service_time
+        self.charger_car[reps, station, charger] = car
+
+    def _append_to_queue(self, reps: np.ndarray, station: np.ndarray, car: np.ndarray):
+        position = self.queue_length[reps, station]
+        while len(position) and position.max() >= self.queue_car.shape[2]:
+            self.queue_car = self._grow(self.queue_car, axis=2, fill=0.0)
+
+        self.queue_car[reps, station, position] = car
+        self.queue_length[reps, station] += 1
+
+    def _remove_from_queue(self, reps: np.ndarray, station: np.ndarray, position: int):
+        # shift the cars behind the removed one forward, reps/station pairs are unique
+        self.queue_car[reps, station, position:-1] = self.queue_car[reps, station, position + 1:]
+        self.queue_length[reps, station] -= 1
+
+    def _free_transit_slots(self, reps: np.ndarray) -> np.ndarray:
+        free = np.isinf(self.transit_arrival[reps])
+        if not free.any(axis=1).all():
+            self.transit_arrival = self._grow(self.transit_arrival, axis=1, fill=np.inf)
+            self.transit_station = self._grow(self.transit_station, axis=1, fill=0)
+            self.transit_car = self._grow(self.transit_car, axis=1, fill=0.0)
+            free = np.isinf(self.transit_arrival[reps])
+        return free.argmax(axis=1)
+
+    def _grow(self, array: np.ndarray, axis: int, fill) -> np.ndarray:
+        """
+        Doubles the capacity of array along axis, padding with fill.
+        """
+        padding = list(array.shape)
+        padding[axis] = array.shape[axis]
+        return np.concatenate((array, np.full(padding, fill, dtype=array.dtype)), axis=axis)
+
+    def average_wait_times(self) -> np.ndarray:
+        """
+        Returns the average wait time (drive + queue, minutes) of each replication.
+        """
+        return self.total_wait_time / np.maximum(self.num_cars_processed, 1)
+
+    def main(self):
+        active = np.flatnonzero(self.num_cars_processed < self.num_delays_required)
+        while len(active):
+            self.step(active)
+            active = np.flatnonzero(self.num_cars_processed < self.num_delays_required)
+
+VALIDATION_ALPHA = 0.01 # per-statistic significance level of the agreement check
+
+def validate(routing_policy, num_delays_required, seeds, num_replications) -> bool:
+    """
+    Compares the batch engine against EV_Charging_System.
+    Runs one scalar replication per seed and num_replications batch replications, and compares the
+    per-replication average wait, balking count and reneging count with Welch's t-test. Prints each
+    statistic's means with 95% confidence intervals and p-value, and the replications per second.
+    Use enough seeds for the scalar CI to be tight (20 seeds give about ±0.35 minutes on the mean wait),
+    with 5 the test can only detect a bias of about 5%.
+
+    Returns True if no statistic differs at VALIDATION_ALPHA.
+    """
+    start = time.perf_counter()
+    scalar = {"mean wait": [], "balking": [], "reneging": []}
+    for seed in seeds:
+        sim = EV_Charging_System(routing_policy, num_delays_required, seed)
+        sim.run(num_delays_required) # main() would also time print_results
+        scalar["mean wait"].append(sum(sim.wait_times) / len(sim.wait_times))
+        scalar["balking"].append(sim.total_balking)
+        scalar["reneging"].append(sim.total_reneging)
+    scalar_rate = len(seeds) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    batch_sim = Batch_EV_Charging_System(routing_policy, num_delays_required, num_replications, seeds[0])
+    batch_sim.main()
+    batch_rate = num_replications / (time.perf_counter() - start)
+    batch = {"mean wait": batch_sim.average_wait_times(), "balking": batch_sim.total_balking, "reneging": batch_sim.total_reneging}
+
+    print("\n" + "="*50)
+    print(f"Batch engine validation: {routing_policy.name}")
+    print(f"Scalar: R = {len(seeds)}, {scalar_rate:.2f} replications/s")
+    print(f"Batch: R = {num_replications}, {batch_rate:.2f} replications/s ({batch_rate / scalar_rate:.1f}x)")
+
+    agree = True
+    for statistic in scalar:
+        scalar_values = np.asarray(scalar[statistic], dtype=float)
+        batch_values = np.asarray(batch[statistic], dtype=float)
+        if scalar_values.std() == 0 and batch_values.std() == 0:
+            p_value = 1.0 if scalar_values[0] == batch_values[0] else 0.0 # t-test undefined without variance
+        else:
+            p_value = ttest_ind(scalar_values, batch_values, equal_var=False).pvalue
+        agree = agree and p_value >= VALIDATION_ALPHA
+
+        intervals = []
+        for values in (scalar_values, batch_values):
+            H = t.ppf(1 - 0.025, len(values) - 1) * values.std(ddof=1) / np.sqrt(len(values))
+            intervals.append(f"{values.mean():.3f} ± {H:.3f}")
+        print(f"{statistic}: scalar {intervals[0]}, batch {intervals[1]}, Welch p = {p_value:.3f}")
+
+    print("Engines agree" if agree else f"Engines DIFFER at alpha = {VALIDATION_ALPHA}")
+    print("="*50)
+    return agree
+
+if __name__ == "__main__":
+    results = []
+    for policy in (RoutingPolicy.CLOSEST_STATION_FIRST, RoutingPolicy.SHORTEST_ESTIMATED_WAIT):
+        # the per-step NumPy overhead is only amortized over enough replications, the speedup over
+        # the scalar engine is ~6x at 200 replications and passes 10x around 1000
+        results.append(validate(policy, num_delays_required=10000, seeds=list(range(1, 21)), num_replications=2000))
+    if not all(results):
+        raise SystemExit(1)
@@ -3,6 +3,7 @@ import numpy as np
 from station_meta import Station_Meta
 from typing import Iterable
 from charging_station import Charging_Station
+from road_network import Road_Network
 from constants import ENERGY_CONSUMPTION_RATE, BATTERY_CAPACITY, MIN_BATTERY_THRESHOLD, BATTERY_MIN, BATTERY_MAX, TARGET_MAX_FINAL_BATTERY, MIN_CHARGE_AMOUNT, X_MIN, X_MAX, Y_MIN, Y_MAX, SPEED_KM
 
 class Car:
@@ -17,9 +18,11 @@ class Car:
     routed_arrival_time: float # arrival time at station 
     time_in_queue: float # time spent in queue (minutes)
     total_time_in_system: float | None # total time in system (minutes)
+    road_network: Road_Network | None # road graph travel times, None for straight-line driving
 
-    def __init__(self, system_arrival_time: float, stations: Iterable[Charging_Station]):
+    def __init__(self, system_arrival_time: float, stations: Iterable[Charging_Station], road_network: Road_Network | None = None):
         self.system_arrival_time = system_arrival_time 
+        self.road_network = road_network
         self.position = self._set_position()
         self.battery_level_initial = self._set_battery_level_initial() 
         self.target_charge_level = self._set_target_charge_level() 
@@ -76,17 +79,16 @@ class Car:
 
         for station in stations:
             # get the estimate soc after drive
-            distance_km = self._get_euclidian_to_station(station)
+            distance_km, drive_time_minutes = self._get_distance_and_drive_time(station)
             soc_after_drive = self.get_estimated_soc_after_driving_km(distance_km)
 
             if soc_after_drive is None:
                 continue # car cannot reach this station, check the next station
 
             # otherwise station is reachable, create station meta object
-            drive_time_minutes = distance_km / (SPEED_KM / 60)  # get the drive time in minutes
             station_meta = Station_Meta(
                 station, # station object
-                distance_km, # eculidian distance from spawn point of car to station
+                distance_km, # driving distance from spawn point of car to station
                 drive_time_minutes, # drive time from spawn point of car to station
                 soc_after_drive # estimated soc after driving to station
             )
@@ -113,6 +115,20 @@ class Car:
             return None   
         return soc_after_drive
 
+    def _get_distance_and_drive_time(self, station) -> tuple[float, float]:
+        """
+        Gets the distance and drive time from the cars spawn point to the station specified.
+        Uses the precomputed road network matrices if the car has a road network, otherwise
+        the euclidean distance driven at SPEED_KM.
+
+        Returns (distance in kilometers, drive time in minutes).
+        """
+        if self.road_network is not None:
+            return self.road_network.get_distance_and_drive_time(self.position, station)
+
+        distance_km = self._get_euclidian_to_station(station)
+        return distance_km, distance_km / (SPEED_KM / 60)  # get the drive time in minutes
+
     def _get_euclidian_to_station(self, station) -> float:
         """
         Compute the Euclidean distance from the cars spawn point to the station specified.
@@ -0,0 +1,59 @@
+import numpy as np
+
+from constants import BATTERY_CAPACITY, CHARGE_CURVE_RESOLUTION
+
+# SoC-dependent charging power for one charger class.
+# Power is piecewise linear in SoC between the given breakpoints. The time needed to charge
+# from 0% to every SoC on a fine grid is precomputed once, so the service time for any
+# (soc_in, soc_out) pair is two table lookups with linear interpolation instead of an integration per car.
+class Charge_Curve:
+    soc_points: list[float]             # SoC breakpoints (%)
+    power_points_kw: list[float]        # charging power at each breakpoint (kW)
+    resolution: float                   # requested SoC step of the lookup table (%)
+    step: float                         # actual SoC step of the grid, 100 / number of intervals (%)
+    soc_grid: np.ndarray                # SoC (%) of each lookup table entry
+    cumulative_time_table: np.ndarray   # minutes to charge from 0% to each SoC on the grid
+    cumulative_time: list[float]        # same table as a list for scalar lookups
+
+    def __init__(self, curve: list[tuple[float, float]], resolution: float = CHARGE_CURVE_RESOLUTION):
+        self.soc_points = [soc for soc, _ in curve]
+        self.power_points_kw = [power for _, power in curve]
+        self.resolution = resolution
+        self.soc_grid = np.linspace(0.0, 100.0, max(int(round(100.0 / resolution)), 1) + 1)
+        self.step = 100.0 / (len(self.soc_grid) - 1) # equals resolution only when it divides 100
+        self.cumulative_time_table = self._build_cumulative_time()
+        self.cumulative_time = self.cumulative_time_table.tolist() # scalar indexing is faster on a list than on an ndarray
+
+    def _build_cumulative_time(self) -> np.ndarray:
+        """
+        Integrates dt = (dSoC * BATTERY_CAPACITY) / P(SoC) over the SoC grid using the trapezoid rule.
+
+        Returns the cumulative charge time (minutes) from 0% to each grid point.
+        """
+        power_kw = np.interp(self.soc_grid, self.soc_points, self.power_points_kw) # power at each grid point
+        inverse_power = 1.0 / power_kw
+
+        # time for each SoC slice, in minutes
+        slice_time = (self.step / 100.0) * BATTERY_CAPACITY * 60.0 * (inverse_power[:-1] + inverse_power[1:]) / 2.0
+        return np.concatenate(([0.0], np.cumsum(slice_time)))
+
+    def time_to_soc(self, soc: float) -> float:
+        """
+        Looks up the time (minutes) needed to charge from 0% to the given SoC (%).
+        """
+        position = min(max(soc, 0.0), 100.0) / self.step
+        idx = min(int(position), len(self.cumulative_time) - 2)
+        frac = position - idx
+        return self.cumulative_time[idx] + frac * (self.cumulative_time[idx + 1] - self.cumulative_time[idx])
+
+    def charge_time(self, soc_in: float, soc_out: float) -> float:
+        """
+        Computes the time (minutes) needed to charge from soc_in to soc_out (%).
+        """
+        return self.time_to_soc(soc_out) - self.time_to_soc(soc_in)
+
+    def charge_times(self, soc_in: np.ndarray, soc_out: np.ndarray) -> np.ndarray:
+        """
+        Vectorized charge_time for arrays of SoC pairs, used by the batch engine.
+        """
+        return np.interp(soc_out, self.soc_grid, self.cumulative_time_table) - np.interp(soc_in, self.soc_grid, self.cumulative_time_table)
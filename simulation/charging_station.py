@@ -7,12 +7,16 @@ if TYPE_CHECKING:
 import heapq
 
 from event import EventType
+from charge_curve import Charge_Curve
 from constants import (
-    BATTERY_CAPACITY,
-    FAST_CHARGER_POWER_KW,
-    SLOW_CHARGER_POWER_KW
+    FAST_CHARGE_CURVE_POINTS,
+    SLOW_CHARGE_CURVE_POINTS
 )
 
+# lookup tables are built once and shared by every station
+FAST_CHARGER_CURVE = Charge_Curve(FAST_CHARGE_CURVE_POINTS)
+SLOW_CHARGER_CURVE = Charge_Curve(SLOW_CHARGE_CURVE_POINTS)
+
 class Charging_Station:
     station_id: int
     position: Tuple[float, float]
@@ -27,6 +31,9 @@ class Charging_Station:
     mean_fast_service: float
     mean_slow_service: float
 
+    fast_charge_curve: Charge_Curve
+    slow_charge_curve: Charge_Curve
+
     arrival_event: EventType
     depart_fast_event: EventType
     depart_slow_event: EventType
@@ -46,6 +53,9 @@ class Charging_Station:
         self.mean_fast_service = 0.5
         self.mean_slow_service = 1.0
 
+        self.fast_charge_curve = FAST_CHARGER_CURVE
+        self.slow_charge_curve = SLOW_CHARGER_CURVE
+
         # event type mapping
         self.arrival_event = {
             1: EventType.ARRIVAL_STATION_1,
@@ -80,7 +90,7 @@ class Charging_Station:
             self.fast_charger_status = 1
 
             # compute service time and schedule departure
-            service_time = self.compute_charge_time(car.target_charge_level, car.soc_after_drive, FAST_CHARGER_POWER_KW)          
+            service_time = self.compute_charge_time(car.target_charge_level, car.soc_after_drive, self.fast_charge_curve)          
             car.time_charging = service_time
             depart_time = self.sim_time() + service_time
 
@@ -94,7 +104,7 @@ class Charging_Station:
             self.slow_charger_status = 1
 
             # compute service time and schedule departure
-            service_time = self.compute_charge_time(car.target_charge_level, car.soc_after_drive, SLOW_CHARGER_POWER_KW)
+            service_time = self.compute_charge_time(car.target_charge_level, car.soc_after_drive, self.slow_charge_curve)
             car.time_charging = service_time # set the car's service time
             depart_time = self.sim_time() + service_time # compute departure time
 
@@ -118,7 +128,7 @@ class Charging_Station:
         next_car.time_in_queue = self.sim_time() - next_car.routed_arrival_time  # set the car's time in queue
 
         # compute service time and schedule departure
-        service_time = self.compute_charge_time(next_car.target_charge_level, next_car.soc_after_drive, FAST_CHARGER_POWER_KW)
+        service_time = self.compute_charge_time(next_car.target_charge_level, next_car.soc_after_drive, self.fast_charge_curve)
         next_car.time_charging = service_time  # set the car's service time
         depart_time = self.sim_time() + service_time
 
@@ -137,24 +147,23 @@ class Charging_Station:
         next_car.time_in_queue = self.sim_time() - next_car.routed_arrival_time
 
         # compute service time and schedule departure
-        service_time = self.compute_charge_time(next_car.target_charge_level, next_car.soc_after_drive, SLOW_CHARGER_POWER_KW)
+        service_time = self.compute_charge_time(next_car.target_charge_level, next_car.soc_after_drive, self.slow_charge_curve)
         next_car.time_charging = service_time  # set the car's service time
         depart_time = self.sim_time() + service_time
 
         heapq.heappush(event_queue,
             (depart_time, self.depart_slow_event, next_car))
 
-    def compute_charge_time(self, target_charge_level, soc_after_drive, charge_rate_kw: float) -> float:
+    def compute_charge_time(self, target_charge_level, soc_after_drive, charge_curve: Charge_Curve) -> float:
         """
-        Computes the estimated charge time (in hours) for the given car
-        based on its target charge level. Affected by the service rate of the charger it gets assigned to.
+        Computes the estimated charge time (in minutes) for the given car
+        based on its target charge level. Affected by the charge curve of the charger it gets assigned to,
+        since charging power drops as the SoC rises.
         Args:
             target_charge_level (float): The target charge level for the car.
-            battery_level_initial (float): The initial battery level of the car.
-            charge_rate_kw (float): The charging rate of the charger in kW.
+            soc_after_drive (float): The battery level of the car when it arrives at the station.
+            charge_curve (Charge_Curve): The precomputed charge curve of the charger.
             Returns:       
             float: Estimated charge time in minutes
         """
-        soc_diff = (target_charge_level - soc_after_drive) / 100.0 # fraction of battery to charge
-        time_in_minutes = ((soc_diff * BATTERY_CAPACITY) / charge_rate_kw) * 60.0 
-        return time_in_minutes # return the service time in minutes
+        return charge_curve.charge_time(soc_after_drive, target_charge_level) # return the service time in minutes
@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+from sim_service import Simulation_Service, submit, cancel
+
+# Localhost check of the simulation service, run with `python check_sim_service.py`.
+# Starts a service on a free port and drives it through the submit and cancel client helpers.
+# The pool workers are spawned, so the entry point must stay under the __main__ guard.
+
+SCENARIO = {"policy": "closest_station_first", "seed": 3, "num_delays_required": 5000}
+LONG_RUN = 10**6 # long enough that only a cancel or the precision target ends the run
+
+async def collect(scenario: dict, port: int) -> list[dict]:
+    return [message async for message in submit(scenario, port=port)]
+
+async def check_progress_stream(port: int):
+    messages = await collect(SCENARIO, port)
+    accepted, *progress, done = messages
+    assert accepted["type"] == "accepted" and not accepted["cached"] and not accepted["shared"], accepted
+    assert progress and all(m["type"] == "progress" for m in progress), progress
+    assert all(m["mean_wait"] is not None and len(m["queue_lengths"]) == 3 for m in progress)
+    assert progress[-1]["half_width"] is not None
+    assert done["type"] == "done" and done["status"] == "completed", done
+    assert done["cars_processed"] == SCENARIO["num_delays_required"], done
+    print(f"progress stream: {len(progress)} progress messages, mean wait {done['mean_wait']:.3f} ± {done['half_width']:.3f}")
+    return done
+
+async def check_cache_hit(port: int, first_done: dict):
+    accepted, done = await collect(SCENARIO, port)
+    assert accepted["cached"], accepted
+    assert done["mean_wait"] == first_done["mean_wait"], done
+    print("cache hit: answered without running")
+
+async def check_shared_run(port: int):
+    scenario = {**SCENARIO, "seed": 11, "num_delays_required": 10000}
+    first, second = await asyncio.gather(collect(scenario, port), collect(scenario, port))
+    assert sorted((first[0]["shared"], second[0]["shared"])) == [False, True], (first[0], second[0])
+    assert first[-1]["status"] == second[-1]["status"] == "completed"
+    assert first[-1]["mean_wait"] == second[-1]["mean_wait"]
+    print("shared run: concurrent identical submissions ran once")
+
+async def check_cancel(port: int):
+    done = None
+    async for message in submit({**SCENARIO, "seed": 4, "num_delays_required": LONG_RUN}, port=port):
+        if message["type"] == "progress" and done is None:
+            done = False
+            reply = await cancel(message["run_id"], port=port)
+            assert reply["type"] == "cancelling", reply
+        if message["type"] == "done":
+            done = message
+    assert done["status"] == "cancelled" and done["cars_processed"] < LONG_RUN, done
+    print(f"cancel: stopped after {done['cars_processed']} cars")
+
+async def check_cancel_shared(port: int):
+    scenario = {**SCENARIO, "seed": 12, "num_delays_required": 10000}
+
+    async def cancel_after_first_progress():
+        async for message in submit(scenario, port=port):
+            if message["type"] == "progress":
+                await cancel(message["run_id"], port=port)
+            if message["type"] == "done":
+                return message
+
+    cancelled, kept = await asyncio.gather(cancel_after_first_progress(), collect(scenario, port))
+    assert cancelled["status"] == "cancelled", cancelled
+    assert kept[-1]["status"] == "completed", kept[-1]
+    print("cancel shared: the other subscriber still completed")
+
+async def check_precision(port: int):
+    target = 1.0
+    *_, done = await collect({**SCENARIO, "seed": 5, "num_delays_required": LONG_RUN, "target_half_width": target}, port)
+    assert done["status"] == "precision_reached" and done["half_width"] <= target, done
+    print(f"precision: stopped at half-width {done['half_width']:.3f} after {done['cars_processed']} cars")
+
+async def check_invalid_requests(port: int):
+    invalid_scenarios = [
+        {**SCENARIO, "policy": "not_a_policy"},
+        {**SCENARIO, "seed": -1},
+        {**SCENARIO, "seed": 2**32},
+        {**SCENARIO, "seed": 1.5},
+        {**SCENARIO, "num_delays_required": 0},
+    ]
+    for scenario in invalid_scenarios:
+        [error] = await collect(scenario, port) # rejected before anything is accepted or run
+        assert error["type"] == "error" and error["message"].startswith("invalid scenario"), error
+    for run_id in (999999, [1], {"id": 1}, "1", True):
+        reply = await cancel(run_id, port=port)
+        assert reply["type"] == "error", reply
+
+    # a request line over the 64 KiB stream limit gets an error and the connection is closed
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"x" * 100_000 + b"\n")
+    await writer.drain()
+    reply = json.loads(await reader.readline())
+    assert reply["type"] == "error", reply
+    assert await reader.read() == b"", "connection should be closed"
+    writer.close()
+    await writer.wait_closed()
+    print("invalid requests: rejected with errors")
+
+async def main():
+    service = Simulation_Service(port=0, max_workers=2)
+    await service.start()
+    try:
+        first_done = await check_progress_stream(service.port)
+        await check_cache_hit(service.port, first_done)
+        await check_shared_run(service.port)
+        await check_cancel(service.port)
+        await check_cancel_shared(service.port)
+        await check_precision(service.port)
+        await check_invalid_requests(service.port)
+    finally:
+        await service.stop()
+    print("all checks passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,8 +1,24 @@
 SLOW_CHARGER_POWER_KW = 4.8   # BC Hydro Level 2 ~ 4.8 kW
 FAST_CHARGER_POWER_KW = 200   # BC Hydro Fast Charger ~ 200 kW Level 3
 
+# Charge curves as (SoC %, power kW) breakpoints, power is interpolated linearly between them
+# DC fast chargers hold peak power to ~50% and taper heavily above that
+FAST_CHARGE_CURVE_POINTS = [(0, FAST_CHARGER_POWER_KW), (50, FAST_CHARGER_POWER_KW), (80, 0.5 * FAST_CHARGER_POWER_KW), (100, 0.15 * FAST_CHARGER_POWER_KW)]
+# Level 2 chargers are limited by the onboard charger and only taper near full
+SLOW_CHARGE_CURVE_POINTS = [(0, SLOW_CHARGER_POWER_KW), (90, SLOW_CHARGER_POWER_KW), (100, 0.5 * SLOW_CHARGER_POWER_KW)]
+CHARGE_CURVE_RESOLUTION = 0.1 # SoC step (%) of the precomputed charge time lookup tables
+
 MAX_QUEUE_LENGTH = 10  # maximum acceptable queue length
 TIME_FACTOR = 15.0  # factor to estimate wait times in queue
+RENEGE_QUEUE_POSITION = 5 # the car at this queue index (the 6th car) may renege
+RENEGE_WAIT_TIME = 15 # minutes the car at RENEGE_QUEUE_POSITION waits before it reneges
+MEAN_INTERARRIVAL_TIME = 5 # mean time between cars entering the system (minutes)
+
+STATION_POSITIONS = [
+    [3.62, 2.93],   # Belmont park area
+    [9.29, 4.91],   # Uptown / NE side
+    [10.32, 1.74],  # West / highway area
+]
 
 # Constraints for the maximum and minimum battery levels for generated cars
 BATTERY_MIN = 20 # 30% OST study recommended this assumption for the equation used for service time
@@ -18,4 +34,14 @@ X_MIN = 0.0 # minimum x coordinate for simulation area
 X_MAX = 13 # maximum x coordinate for simulation area
 Y_MIN = 0.0 # minimum y coordinate for simulation area
 Y_MAX = 7.5 # maximum y coordinate for simulation area
-SPEED_KM = 30 # average speed in km/h
\ No newline at end of file
+SPEED_KM = 30 # average speed in km/h
+
+# Road network mode, see road_network.py
+ROAD_GRID_CELL_KM = 0.25 # side length of the origin cells spawn points are snapped to (km)
+ROAD_CACHE_DIR = ".road_cache" # directory for the precomputed cell to station matrices
+
+# Simulation service, see sim_service.py
+SERVICE_HOST = "127.0.0.1" # the service only listens locally
+SERVICE_PORT = 8765
+REPORT_INTERVAL = 1000 # departures between progress messages of a run
+CI_NUM_BATCHES = 20 # batches used for the batch means confidence interval of the running mean wait
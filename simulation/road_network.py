@@ -0,0 +1,210 @@
+import hashlib
+import heapq
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from typing import Iterable
+from charging_station import Charging_Station
+from constants import X_MIN, X_MAX, Y_MIN, Y_MAX, SPEED_KM, ROAD_GRID_CELL_KM, ROAD_CACHE_DIR
+
+# Road graph travel times from spawn points to stations.
+# The simulation area is split into a coarse grid of origin cells, every cell and every station is
+# snapped to its nearest graph node, and the shortest-path travel time and distance from every cell to every
+# station is precomputed once. Cars then look up their drive to a station by indexing the matrices.
+#
+# The graph file is JSON:
+# {
+#     "nodes": {"<node id>": [x, y], ...},
+#     "edges": [{"from": "<node id>", "to": "<node id>", "length_km": 1.2, "speed_kmh": 50, "oneway": false}, ...]
+# }
+# speed_kmh defaults to SPEED_KM and oneway defaults to false.
+class Road_Network:
+    graph_file: str                     # path of the road graph file
+    cell_size_km: float                 # side length of an origin cell
+    num_cols: int                       # number of origin cells along x
+    num_rows: int                       # number of origin cells along y
+    drive_time_table: np.ndarray        # (cell, station index) -> drive time (minutes)
+    distance_table: np.ndarray          # (cell, station index) -> road distance (km)
+    drive_time_matrix: list[list[float]]   # drive_time_table as nested lists for scalar lookups
+    distance_matrix: list[list[float]]     # distance_table as nested lists for scalar lookups
+
+    def __init__(self, graph_file: str, stations: Iterable[Charging_Station], cell_size_km: float = ROAD_GRID_CELL_KM, cache_dir: str = ROAD_CACHE_DIR):
+        self.graph_file = graph_file
+        self.cell_size_km = cell_size_km
+        self.num_cols = int(np.ceil((X_MAX - X_MIN) / cell_size_km))
+        self.num_rows = int(np.ceil((Y_MAX - Y_MIN) / cell_size_km))
+
+        stations = sorted(stations, key=lambda s: s.station_id) # matrix column i is station i + 1
+        with open(graph_file, "rb") as f:
+            graph_bytes = f.read()
+
+        cache_path = os.path.join(cache_dir, self._cache_key(graph_bytes, stations) + ".npz")
+        matrices = self._load_cache(cache_path)
+        if matrices is None:
+            matrices = self._build_matrices(json.loads(graph_bytes), stations)
+            self._save_cache(cache_path, *matrices)
+        drive_time, distance = matrices
+
+        self.drive_time_table = drive_time
+        self.distance_table = distance
+        # plain lists, scalar indexing is faster than on an ndarray in the per-car lookups
+        self.drive_time_matrix = drive_time.tolist()
+        self.distance_matrix = distance.tolist()
+
+    def _load_cache(self, cache_path: str) -> tuple[np.ndarray, np.ndarray] | None:
+        """
+        Loads the matrices from the disk cache.
+
+        Returns (drive_time, distance), or None if there is no usable cache file.
+        """
+        try:
+            with np.load(cache_path) as cached:
+                return cached["drive_time"], cached["distance"]
+        except Exception:
+            return None # missing, or partly written by an older version, rebuild and overwrite it
+
+    def _save_cache(self, cache_path: str, drive_time: np.ndarray, distance: np.ndarray):
+        """
+        Writes the matrices to a temporary file and moves it into place, so an interrupted write or
+        several processes building the same matrices never leave a partial cache file behind.
+        """
+        cache_dir = os.path.dirname(cache_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".npz.tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, drive_time=drive_time, distance=distance)
+            os.replace(temp_path, cache_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def _cache_key(self, graph_bytes: bytes, stations: list[Charging_Station]) -> str:
+        """
+        Hashes the graph file together with everything else the matrices depend on.
+
+        Returns the hex digest used as the cache file name.
+        """
+        key = hashlib.sha256(graph_bytes)
+        key.update(repr((self.cell_size_km, X_MIN, X_MAX, Y_MIN, Y_MAX, SPEED_KM)).encode())
+        key.update(repr([(s.station_id, tuple(s.position)) for s in stations]).encode())
+        return key.hexdigest()
+
+    def _build_matrices(self, graph: dict, stations: list[Charging_Station]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Builds the cell to station drive time (minutes) and distance (km) matrices.
+
+        Each station gets one reverse Dijkstra search that reaches every node, and therefore every
+        origin cell, at once. The straight-line legs from a cell center to its snapped node and from a
+        station's snapped node to the station are driven at SPEED_KM.
+
+        Returns (drive_time, distance) arrays of shape (num_cells, num_stations).
+        """
+        node_ids = list(graph["nodes"])
+        node_index = {node_id: i for i, node_id in enumerate(node_ids)}
+        node_xy = np.array([graph["nodes"][node_id] for node_id in node_ids], dtype=float)
+
+        # reversed adjacency list so a search from a station gives the shortest path from every node to it
+        reverse_adjacency = [[] for _ in node_ids]
+        for edge in graph["edges"]:
+            u, v = node_index[edge["from"]], node_index[edge["to"]]
+            length_km = float(edge["length_km"])
+            time_minutes = length_km / (float(edge.get("speed_kmh", SPEED_KM)) / 60)
+            reverse_adjacency[v].append((u, time_minutes, length_km))
+            if not edge.get("oneway", False):
+                reverse_adjacency[u].append((v, time_minutes, length_km))
+
+        # snap every cell center to its nearest node
+        cell_centers = self._cell_centers()
+        cell_nodes, cell_offsets = self._snap(cell_centers, node_xy)
+
+        station_xy = np.array([s.position for s in stations], dtype=float)
+        station_nodes, station_offsets = self._snap(station_xy, node_xy)
+
+        drive_time = np.empty((len(cell_centers), len(stations)))
+        distance = np.empty((len(cell_centers), len(stations)))
+        for j in range(len(stations)):
+            node_time, node_distance = self._dijkstra(reverse_adjacency, station_nodes[j])
+            access_km = cell_offsets + station_offsets[j]
+            drive_time[:, j] = node_time[cell_nodes] + access_km / (SPEED_KM / 60)
+            distance[:, j] = node_distance[cell_nodes] + access_km
+
+        return drive_time, distance
+
+    def _cell_centers(self) -> np.ndarray:
+        """
+        Returns the (x, y) center of every origin cell, in row-major order.
+        """
+        xs = X_MIN + (np.arange(self.num_cols) + 0.5) * self.cell_size_km
+        ys = Y_MIN + (np.arange(self.num_rows) + 0.5) * self.cell_size_km
+        grid_x, grid_y = np.meshgrid(xs, ys) # shape (num_rows, num_cols)
+        return np.column_stack((grid_x.ravel(), grid_y.ravel()))
+
+    def _snap(self, points: np.ndarray, node_xy: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the nearest graph node for each point.
+
+        Returns (node indices, straight-line distances to those nodes in km).
+        """
+        nodes = np.empty(len(points), dtype=int)
+        offsets = np.empty(len(points))
+        for i, point in enumerate(points):
+            d = np.hypot(node_xy[:, 0] - point[0], node_xy[:, 1] - point[1])
+            nodes[i] = np.argmin(d)
+            offsets[i] = d[nodes[i]]
+        return nodes, offsets
+
+    def _dijkstra(self, adjacency: list[list[tuple[int, float, float]]], source: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Shortest travel time from source to every node, along with the distance of that fastest path.
+        Unreachable nodes get infinite time and distance.
+
+        Returns (time in minutes, distance in km) arrays indexed by node.
+        """
+        best_time = np.full(len(adjacency), np.inf)
+        best_distance = np.full(len(adjacency), np.inf)
+        best_time[source] = 0.0
+        best_distance[source] = 0.0
+
+        frontier = [(0.0, 0.0, source)] # (time, distance, node)
+        while frontier:
+            time_minutes, distance_km, node = heapq.heappop(frontier)
+            if time_minutes > best_time[node]:
+                continue # stale entry
+            for neighbour, edge_time, edge_km in adjacency[node]:
+                new_time = time_minutes + edge_time
+                if new_time < best_time[neighbour]:
+                    best_time[neighbour] = new_time
+                    best_distance[neighbour] = distance_km + edge_km
+                    heapq.heappush(frontier, (new_time, distance_km + edge_km, neighbour))
+
+        return best_time, best_distance
+
+    def get_cell(self, position: tuple[float, float]) -> int:
+        """
+        Returns the index of the origin cell that contains the position.
+        """
+        col = min(int((position[0] - X_MIN) / self.cell_size_km), self.num_cols - 1)
+        row = min(int((position[1] - Y_MIN) / self.cell_size_km), self.num_rows - 1)
+        return row * self.num_cols + col
+
+    def get_distance_and_drive_time(self, position: tuple[float, float], station: Charging_Station) -> tuple[float, float]:
+        """
+        Looks up the road distance (km) and drive time (minutes) from a spawn position to a station.
+        """
+        cell = self.get_cell(position)
+        return self.distance_matrix[cell][station.station_id - 1], self.drive_time_matrix[cell][station.station_id - 1]
+
+    def get_distances_and_drive_times(self, xs: np.ndarray, ys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized lookup for many spawn positions at once, used by the batch engine.
+
+        Returns (distance in km, drive time in minutes) arrays of shape (num_positions, num_stations).
+        """
+        cols = np.minimum(((xs - X_MIN) / self.cell_size_km).astype(int), self.num_cols - 1)
+        rows = np.minimum(((ys - Y_MIN) / self.cell_size_km).astype(int), self.num_rows - 1)
+        cells = rows * self.num_cols + cols
+        return self.distance_table[cells], self.drive_time_table[cells]
@@ -9,6 +9,7 @@ POLICIES = [
 ]
 NUM_DELAYS_REQUIRED = 100000
 OUTPUT_FILE = "simulation_results.csv"
+ROAD_GRAPH_FILE = None # path to a road graph JSON file (see road_network.py), None for straight-line driving
 
 def run_replications():
 
@@ -21,7 +22,8 @@ def run_replications():
             sim = EV_Charging_System(
                 policy,
                 num_delays_required=NUM_DELAYS_REQUIRED,
-                seed=seed
+                seed=seed,
+                road_graph_file=ROAD_GRAPH_FILE
             )
             sim.main()
 
@@ -0,0 +1,365 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing
+import queue
+
+from concurrent.futures import ProcessPoolExecutor
+from scipy.stats import t
+
+from routing_policies import RoutingPolicy
+from system import EV_Charging_System
+from constants import SERVICE_HOST, SERVICE_PORT, REPORT_INTERVAL, CI_NUM_BATCHES
+
+# Long-running local simulation service for the what-if dashboard.
+# Clients connect over TCP and exchange newline-delimited JSON messages:
+#
+#   {"op": "submit", "policy": "closest_station_first", "seed": 3, "num_delays_required": 100000,
+#    "target_half_width": 0.1, "road_graph_file": null}
+#       -> {"type": "accepted", "run_id": 1, "cached": false, "shared": false}
+#       -> {"type": "progress", "run_id": 1, "cars_processed": ..., "mean_wait": ..., "half_width": ..., "queue_lengths": [...], ...}
+#       -> {"type": "done", "run_id": 1, "status": "completed" | "precision_reached" | "cancelled", ...}
+#   {"op": "cancel", "run_id": 1}
+#       -> {"type": "cancelling", "run_id": 1}
+#
+# target_half_width and road_graph_file are optional. A run stops early once the 95% CI half-width of the
+# mean wait drops to target_half_width. Runs execute on a process pool. Finished runs are cached by scenario,
+# so an identical submission is answered immediately ("cached": true). An identical submission made while the
+# run is still going subscribes to it ("shared": true) and receives its progress so far and its result.
+# Cancelling stops the stream for that submission, the simulation stops once nobody is subscribed.
+# Errors are reported as {"type": "error", "message": ...}.
+#
+# The pool workers are started with spawn, which re-imports the main module of the process that starts the
+# service. Any script that runs Simulation_Service must therefore start it under an
+# `if __name__ == "__main__":` guard, otherwise the workers fail at startup.
+# check_sim_service.py exercises the whole protocol on localhost.
+
+def integer_field(request: dict, name: str) -> int:
+    """
+    Reads an integer field of a request. Integral floats such as 3.0 are accepted,
+    1.5, booleans and strings are rejected rather than silently converted.
+    """
+    value = request[name]
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+    return int(value)
+
+def scenario_key(request: dict) -> tuple:
+    """
+    Validates a submit request and normalizes it into the results cache key.
+    The road graph is keyed by a hash of its contents as well as its path, so editing the graph file
+    invalidates the cached results computed from it.
+    Raises ValueError, KeyError or OSError for an invalid request.
+    """
+    policy = RoutingPolicy(request["policy"])
+    seed = integer_field(request, "seed")
+    if not 0 <= seed < 2**32:
+        raise ValueError("seed must be between 0 and 2**32 - 1") # the range np.random.seed accepts
+    num_delays_required = integer_field(request, "num_delays_required")
+    if num_delays_required <= 0:
+        raise ValueError("num_delays_required must be positive")
+    target_half_width = request.get("target_half_width")
+    if target_half_width is not None:
+        target_half_width = float(target_half_width)
+    road_graph_file = request.get("road_graph_file")
+    road_graph_hash = None
+    if road_graph_file is not None:
+        with open(road_graph_file, "rb") as f:
+            road_graph_hash = hashlib.sha256(f.read()).hexdigest()
+    return (policy.value, seed, num_delays_required, target_half_width, road_graph_file, road_graph_hash)
+
+def batch_means_half_width(wait_times: list[float], num_batches: int = CI_NUM_BATCHES) -> float | None:
+    """
+    95% confidence interval half-width of the mean wait, using the method of batch means
+    since the wait times of consecutive cars are correlated.
+
+    Returns None until there are at least two cars per batch.
+    """
+    batch_size = len(wait_times) // num_batches
+    if batch_size < 2:
+        return None
+
+    batch_means = [sum(wait_times[i * batch_size:(i + 1) * batch_size]) / batch_size for i in range(num_batches)]
+    mean = sum(batch_means) / num_batches
+    S2 = sum((b - mean)**2 for b in batch_means) / (num_batches - 1)
+    return t.ppf(1 - 0.025, num_batches - 1) * math.sqrt(S2 / num_batches)
+
+def run_statistics(sim: EV_Charging_System) -> dict:
+    """
+    Snapshot of the running statistics of a simulation.
+    """
+    num = sim.num_cars_processed
+    return {
+        "cars_processed": num,
+        "sim_time": sim.sim_time,
+        "mean_wait": sim.total_wait_time / num if num else None,
+        "half_width": batch_means_half_width(sim.wait_times),
+        "mean_time_in_system": sim.total_time_in_system / num if num else None,
+        "queue_lengths": [len(station.queue) for station in sim.stations],
+        "void_counter": list(sim.void_counter),
+        "total_balking": sim.total_balking,
+        "total_reneging": sim.total_reneging,
+    }
+
+def run_scenario(key: tuple, progress_queue, cancel_event) -> dict:
+    """
+    Worker process entry point. Runs the scenario in stages of REPORT_INTERVAL departures,
+    putting a statistics snapshot on progress_queue after each stage, and None when finished.
+
+    Returns the final statistics with the run status.
+    """
+    policy, seed, num_delays_required, target_half_width, road_graph_file, _ = key
+    try:
+        sim = EV_Charging_System(RoutingPolicy(policy), num_delays_required, seed, road_graph_file=road_graph_file)
+        status = "completed"
+        while sim.num_cars_processed < num_delays_required:
+            sim.run(min(sim.num_cars_processed + REPORT_INTERVAL, num_delays_required))
+            stats = run_statistics(sim)
+            progress_queue.put(stats)
+
+            if cancel_event.is_set():
+                status = "cancelled"
+                break
+            if target_half_width is not None and stats["half_width"] is not None and stats["half_width"] <= target_half_width:
+                status = "precision_reached"
+                break
+
+        return {**run_statistics(sim), "status": status}
+    finally:
+        progress_queue.put(None) # tells the service the stream is over
+
+class Shared_Run:
+    """
+    One simulation on the pool, streamed to every submission of the same scenario while it runs.
+    """
+    def __init__(self, cancel_event):
+        self.cancel_event = cancel_event    # tells the worker to stop early
+        self.cancelled = False              # set once the last subscriber has left
+        self.history = []                   # progress snapshots so far, replayed to late subscribers
+        self.subscribers = {}               # run_id -> asyncio.Queue of messages for that submission
+        self.task = None                    # task driving the pool job
+
+    def subscribe(self, run_id: int) -> asyncio.Queue:
+        messages = asyncio.Queue()
+        for stats in self.history:
+            messages.put_nowait({"type": "progress", **stats})
+        self.subscribers[run_id] = messages
+        return messages
+
+    def publish(self, message: dict):
+        for messages in self.subscribers.values():
+            messages.put_nowait(message)
+
+class Simulation_Service:
+    def __init__(self, host: str = SERVICE_HOST, port: int = SERVICE_PORT, max_workers: int | None = None):
+        self.host = host
+        self.port = port # 0 picks a free port, the actual port is set in start()
+        self.max_workers = max_workers
+        self.results_cache = {}     # scenario key -> final statistics of a finished run
+        self.in_flight = {}         # scenario key -> Shared_Run still on the pool
+        self.subscriptions = {}     # run_id -> Shared_Run it is streamed from
+        self._run_ids = itertools.count(1)
+        self._clients = {}          # connection handler task -> its writer
+        self.server = None
+
+    async def start(self):
+        # spawn rather than fork, so the workers do not inherit open client sockets and keep them alive
+        context = multiprocessing.get_context("spawn")
+        self.manager = context.Manager() # queues and events that can be shared with the pool workers
+        self.pool = ProcessPoolExecutor(self.max_workers, mp_context=context)
+        self.server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        for writer in self._clients.values():
+            writer.close() # the handler sees the end of its connection and unsubscribes its runs
+        await asyncio.gather(*self._clients, return_exceptions=True)
+        await self.server.wait_closed()
+        for shared in self.in_flight.values():
+            shared.cancel_event.set()
+        await asyncio.gather(*(shared.task for shared in self.in_flight.values()), return_exceptions=True)
+        self.pool.shutdown(cancel_futures=True)
+        self.manager.shutdown()
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        lock = asyncio.Lock() # several runs may stream to the same connection
+        runs = {} # run_id -> task, for the runs submitted on this connection
+        self._clients[asyncio.current_task()] = writer
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError: # the line is longer than the stream limit, the rest of it cannot be framed
+                    await self._send(writer, lock, {"type": "error", "message": "request line too long, closing connection"})
+                    break
+                if not line:
+                    break
+
+                try:
+                    request = json.loads(line)
+                    op = request["op"]
+                except (ValueError, KeyError, TypeError):
+                    await self._send(writer, lock, {"type": "error", "message": "expected a JSON object with an op"})
+                    continue
+
+                if op == "submit":
+                    try:
+                        key = scenario_key(request)
+                    except (ValueError, KeyError, TypeError, OSError) as e:
+                        await self._send(writer, lock, {"type": "error", "message": f"invalid scenario: {e}"})
+                        continue
+                    run_id = next(self._run_ids)
+                    runs[run_id] = asyncio.create_task(self._run(run_id, key, writer, lock))
+                elif op == "cancel":
+                    run_id = request.get("run_id")
+                    if not isinstance(run_id, int) or isinstance(run_id, bool):
+                        await self._send(writer, lock, {"type": "error", "message": f"run_id must be an integer, got {run_id!r}"})
+                        continue
+                    shared = self.subscriptions.get(run_id)
+                    if shared is None:
+                        await self._send(writer, lock, {"type": "error", "message": f"no active run {run_id}"})
+                        continue
+                    messages = shared.subscribers[run_id]
+                    self._unsubscribe(run_id)
+                    latest = shared.history[-1] if shared.history else {}
+                    messages.put_nowait({"type": "done", **latest, "status": "cancelled"})
+                    await self._send(writer, lock, {"type": "cancelling", "run_id": run_id})
+                else:
+                    await self._send(writer, lock, {"type": "error", "message": f"unknown op: {op}"})
+        except ConnectionError:
+            pass
+        finally:
+            # nobody is listening to this connection's runs anymore
+            for task in runs.values():
+                task.cancel()
+            await asyncio.gather(*runs.values(), return_exceptions=True)
+            writer.close()
+            del self._clients[asyncio.current_task()]
+
+    async def _run(self, run_id: int, key: tuple, writer: asyncio.StreamWriter, lock: asyncio.Lock):
+        """
+        Streams one submission. It is answered from the results cache, joins the identical run that
+        is already on the pool, or starts a new one.
+        """
+        if key in self.results_cache:
+            await self._send(writer, lock, {"type": "accepted", "run_id": run_id, "cached": True, "shared": False})
+            await self._send(writer, lock, {"type": "done", "run_id": run_id, **self.results_cache[key]})
+            return
+
+        shared = self.in_flight.get(key)
+        joined = shared is not None and not shared.cancelled
+        if not joined:
+            shared = Shared_Run(self.manager.Event())
+            self.in_flight[key] = shared
+            shared.task = asyncio.create_task(self._execute(key, shared))
+        messages = shared.subscribe(run_id)
+        self.subscriptions[run_id] = shared
+        try:
+            await self._send(writer, lock, {"type": "accepted", "run_id": run_id, "cached": False, "shared": joined})
+            while True:
+                message = await messages.get()
+                await self._send(writer, lock, {**message, "run_id": run_id})
+                if message["type"] in ("done", "error"):
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self._unsubscribe(run_id)
+
+    def _unsubscribe(self, run_id: int):
+        """
+        Stops streaming a run to one submission, and stops the simulation once nobody is subscribed.
+        """
+        shared = self.subscriptions.pop(run_id, None)
+        if shared is None:
+            return
+        del shared.subscribers[run_id]
+        if not shared.subscribers and shared.task is not None and not shared.task.done():
+            shared.cancelled = True
+            shared.cancel_event.set()
+
+    async def _execute(self, key: tuple, shared: Shared_Run):
+        """
+        Runs a scenario on the pool and publishes its progress and result to the subscribers.
+        """
+        loop = asyncio.get_running_loop()
+        progress_queue = self.manager.Queue()
+        try:
+            future = loop.run_in_executor(self.pool, run_scenario, key, progress_queue, shared.cancel_event)
+            while (stats := await self._next_progress(progress_queue, future)) is not None:
+                shared.history.append(stats)
+                shared.publish({"type": "progress", **stats})
+
+            result = await future
+            if result["status"] != "cancelled":
+                self.results_cache[key] = result
+            shared.publish({"type": "done", **result})
+        except Exception as e:
+            shared.publish({"type": "error", "message": str(e)})
+        finally:
+            if self.in_flight.get(key) is shared: # a cancelled run may already have been replaced
+                del self.in_flight[key]
+
+    async def _next_progress(self, progress_queue, future: asyncio.Future) -> dict | None:
+        """
+        Waits for the next statistics snapshot of a run.
+        The queue is read in a thread so the event loop keeps serving other clients, with a timeout
+        so a worker that died before reporting the end of its stream cannot block the run forever.
+
+        Returns None when the run is over.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                return await loop.run_in_executor(None, progress_queue.get, True, 1.0)
+            except queue.Empty:
+                if future.done():
+                    return None
+
+    async def _send(self, writer: asyncio.StreamWriter, lock: asyncio.Lock, message: dict):
+        async with lock:
+            writer.write(json.dumps(message).encode() + b"\n")
+            await writer.drain()
+
+async def submit(scenario: dict, host: str = SERVICE_HOST, port: int = SERVICE_PORT):
+    """
+    Client helper that submits a scenario and yields the service's messages for it until the run is done.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(json.dumps({"op": "submit", **scenario}).encode() + b"\n")
+        await writer.drain()
+        while line := await reader.readline():
+            message = json.loads(line)
+            yield message
+            if message["type"] in ("done", "error"):
+                break
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+async def cancel(run_id: int, host: str = SERVICE_HOST, port: int = SERVICE_PORT) -> dict:
+    """
+    Client helper that asks the service to stop a run early.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(json.dumps({"op": "cancel", "run_id": run_id}).encode() + b"\n")
+        await writer.drain()
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+if __name__ == "__main__":
+    asyncio.run(Simulation_Service().serve_forever())
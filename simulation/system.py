@@ -6,9 +6,11 @@ from event import EventType
 from charging_station import Charging_Station
 from car import Car
 from routing import Routing
+from road_network import Road_Network
+from constants import MEAN_INTERARRIVAL_TIME, RENEGE_QUEUE_POSITION, RENEGE_WAIT_TIME, STATION_POSITIONS
 
 class EV_Charging_System:
-    def __init__(self, routing_policy, num_delays_required, seed):
+    def __init__(self, routing_policy, num_delays_required, seed, road_graph_file=None):
         self.routing_policy = routing_policy
         self.num_delays_required = num_delays_required
         self.num_cars_processed = 0 
@@ -21,7 +23,7 @@ class EV_Charging_System:
         np.random.seed(seed)
         self.wait_times = []
 
-        self.mean_interarrival_time = 5
+        self.mean_interarrival_time = MEAN_INTERARRIVAL_TIME
         self.sim_time = 0.0
         self.void_counter = [0, 0, 0]  # List to track cars on the way to each station
 
@@ -35,11 +37,14 @@ class EV_Charging_System:
 
         # Stations
         self.stations = [
-            Charging_Station(1, [3.62, 2.93], lambda: self.sim_time),   # Belmont park area
-            Charging_Station(2, [9.29, 4.91], lambda: self.sim_time),   # Uptown / NE side
-            Charging_Station(3, [10.32, 1.74], lambda: self.sim_time),   # West / highway area
+            Charging_Station(i + 1, position, lambda: self.sim_time)
+            for i, position in enumerate(STATION_POSITIONS)
         ]
 
+        # Road network travel times, precomputed once (or loaded from the disk cache) for all cars
+        # Without a graph file cars drive the straight line to each station
+        self.road_network = Road_Network(road_graph_file, self.stations) if road_graph_file else None
+
     def timing(self):
 
         if not self.event_queue:
@@ -61,7 +66,7 @@ class EV_Charging_System:
                     (next_arrival, EventType.ARRIVAL_SYSTEM, None))
 
         # Create the car check if reneging and then routing
-        car = Car(system_arrival_time=self.sim_time, stations=self.stations)
+        car = Car(system_arrival_time=self.sim_time, stations=self.stations, road_network=self.road_network)
         self.reneging()
         routing = Routing(car, self.routing_policy, void_counter=self.void_counter)
 
@@ -114,14 +119,14 @@ class EV_Charging_System:
     def reneging(self):
         for station in self.stations:
             queue = station.queue 
-            if len(queue) <= 5:
+            if len(queue) <= RENEGE_QUEUE_POSITION:
                 continue
 
-            sixth_car = queue[5]
+            sixth_car = queue[RENEGE_QUEUE_POSITION]
             time_waiting =  self.sim_time - sixth_car.routed_arrival_time 
             # If the 6th car has waited too long, it reneges
-            if time_waiting > 15:  # minutes
-                queue.pop(5)
+            if time_waiting > RENEGE_WAIT_TIME:  # minutes
+                queue.pop(RENEGE_QUEUE_POSITION)
                 self.total_reneging += 1
 
     def print_results(self):
@@ -146,8 +151,12 @@ class EV_Charging_System:
         print(F"Simulation end time: {self.sim_time:.2f} minutes")
         print("="*50)
 
-    def main(self):
-        while self.num_cars_processed < self.num_delays_required:
+    def run(self, num_delays_required):
+        """
+        Processes events until num_delays_required cars have departed.
+        Can be called repeatedly with a growing target to advance the simulation in stages.
+        """
+        while self.num_cars_processed < num_delays_required:
             self.timing() # - to get the next event
 
             match self.next_event_type:
@@ -189,6 +198,8 @@ class EV_Charging_System:
                     self.stations[2].departure_slow(self.event_queue)
                     self.record_departure(self.routing)
 
+    def main(self):
+        self.run(self.num_delays_required)
         self.print_results()
 
 if __name__ == "__main__":